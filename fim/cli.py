@@ -5,15 +5,15 @@ Simplified command-line interface for File Integrity Monitor.
 import os
 import sys
 import logging
+from collections import Counter
 from pathlib import Path
 import click
 from rich.console import Console
-from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from .core import BaselineManager
-from .database import DatabaseManager
+from .database import DatabaseManager, dump_json
+from .models import DEFAULT_HASH_ALGORITHM, SUPPORTED_HASH_ALGORITHMS
 
 console = Console()
 
@@ -28,6 +28,32 @@ def setup_logging(verbose: bool = False):
     )
 
 
+def write_json(data):
+    """Write data to stdout as indented UTF-8 JSON, bypassing Rich."""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(dump_json(data).encode("utf-8") + b"\n")
+    sys.stdout.buffer.flush()
+
+
+def print_table(title: str, columns: List[Tuple[str, str]], rows: List[Tuple[str, ...]]):
+    """Render rows as a Rich table on a terminal, or as tab-separated text otherwise."""
+    if console.is_terminal:
+        from rich.table import Table
+        
+        table = Table(title=title)
+        for name, style in columns:
+            table.add_column(name, style=style)
+        for row in rows:
+            table.add_row(*row)
+        
+        console.print(table)
+    else:
+        click.echo(title)
+        click.echo('\t'.join(name for name, _ in columns))
+        for row in rows:
+            click.echo('\t'.join(cell.replace('\n', ', ') for cell in row))
+
+
 @click.group()
 @click.option('--verbose', '-v', is_flag=True, help='Enable verbose logging')
 def main(verbose: bool):
@@ -36,17 +62,24 @@ def main(verbose: bool):
 
 
 @main.command()
-@click.option('--path', '-p', required=True, help='Path to create baseline for')
+@click.option('--path', '-p', required=True, type=click.Path(exists=True),
+              help='Path to create baseline for')
 @click.option('--exclude', '-e', multiple=True, help='File patterns to exclude (e.g., *.tmp)')
-@click.option('--db', default='fim.db', help='Database file path')
-def init(path: str, exclude: tuple, db: str):
+@click.option('--db', default='fim.db', type=click.Path(dir_okay=False), help='Database file path')
+@click.option('--hash-algorithm', default=DEFAULT_HASH_ALGORITHM, show_default=True,
+              type=click.Choice(SUPPORTED_HASH_ALGORITHMS),
+              help='Hash algorithm for file contents (blake3 needs the fast extra)')
+def init(path: str, exclude: tuple, db: str, hash_algorithm: str):
     """Create initial baseline for specified path."""
+    from rich.progress import BarColumn, MofNCompleteColumn, Progress, SpinnerColumn, TextColumn
+    from rich.table import Table
+    
     try:
         console.print(f"[bold blue]Creating baseline for: {path}[/bold blue]")
         
         # Initialize database and baseline manager
-        database = DatabaseManager(db)
-        baseline_manager = BaselineManager(database)
+        database = DatabaseManager.get(db)
+        baseline_manager = BaselineManager(database, hash_algorithm=hash_algorithm)
         
         # Convert exclude tuple to list
         exclude_patterns = list(exclude) if exclude else None
@@ -55,11 +88,16 @@ def init(path: str, exclude: tuple, db: str):
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
             console=console
         ) as progress:
             task = progress.add_task("Creating baseline...", total=None)
             
-            file_records = baseline_manager.create_baseline(path, exclude_patterns)
+            file_records = baseline_manager.create_baseline(
+                path, exclude_patterns,
+                progress_callback=lambda done, total: progress.update(task, completed=done, total=total)
+            )
             
             progress.update(task, description="Baseline created successfully!")
         
@@ -83,18 +121,25 @@ def init(path: str, exclude: tuple, db: str):
 
 @main.command()
 @click.option('--path', '-p', required=True, help='Path to verify')
-@click.option('--db', default='fim.db', help='Database file path')
+@click.option('--db', default='fim.db', type=click.Path(dir_okay=False), help='Database file path')
 @click.option('--format', 'output_format', default='table', 
               type=click.Choice(['table', 'json', 'csv']), help='Output format')
-def verify(path: str, db: str, output_format: str):
+@click.option('--full', is_flag=True,
+              help='Re-hash every file instead of trusting unchanged size/mtime/ctime/inode')
+def verify(path: str, db: str, output_format: str, full: bool):
     """Verify current state against baseline."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    
     try:
         console.print(f"[bold blue]Verifying baseline for: {path}[/bold blue]")
         
         # Initialize database and baseline manager
-        database = DatabaseManager(db)
+        database = DatabaseManager.get(db)
         baseline_manager = BaselineManager(database)
         
+        # --full forces re-hashing; otherwise the platform default applies
+        use_meta_cache = False if full else None
+        
         # Verify baseline
         with Progress(
             SpinnerColumn(),
@@ -103,41 +148,43 @@ def verify(path: str, db: str, output_format: str):
         ) as progress:
             task = progress.add_task("Verifying files...", total=None)
             
-            results = baseline_manager.verify_baseline(path)
+            if output_format == 'json':
+                results = baseline_manager.verify_baseline(path, use_meta_cache=use_meta_cache)
+            else:
+                # Stream results: keep counts plus a short preview per status
+                counts = Counter()
+                previews = {status: [] for status in ('created', 'modified', 'deleted')}
+                
+                if output_format == 'csv':
+                    click.echo("Path,Status")
+                
+                for status, file_path in baseline_manager.iter_verify_baseline(path, use_meta_cache=use_meta_cache):
+                    counts[status] += 1
+                    if status == 'unchanged':
+                        continue
+                    if output_format == 'csv':
+                        click.echo(f"{file_path},{status}")
+                    elif len(previews[status]) < 5:
+                        previews[status].append(file_path)
             
             progress.update(task, description="Verification complete!")
         
         # Display results
         if output_format == 'json':
-            import json
-            console.print(json.dumps(results, indent=2))
-        elif output_format == 'csv':
-            console.print("Path,Status")
-            for file_path in results['created']:
-                console.print(f"{file_path},created")
-            for file_path in results['modified']:
-                console.print(f"{file_path},modified")
-            for file_path in results['deleted']:
-                console.print(f"{file_path},deleted")
-        else:
-            # Table format (default)
-            table = Table(title="Verification Results")
-            table.add_column("Status", style="cyan")
-            table.add_column("Count", style="magenta")
-            table.add_column("Files", style="green")
-            
-            table.add_row("Created", str(len(results['created'])), 
-                         '\n'.join(results['created'][:5]) + ('...' if len(results['created']) > 5 else ''))
-            table.add_row("Modified", str(len(results['modified'])), 
-                         '\n'.join(results['modified'][:5]) + ('...' if len(results['modified']) > 5 else ''))
-            table.add_row("Deleted", str(len(results['deleted'])), 
-                         '\n'.join(results['deleted'][:5]) + ('...' if len(results['deleted']) > 5 else ''))
-            table.add_row("Unchanged", str(len(results['unchanged'])), "")
+            write_json(results)
+        elif output_format == 'table':
+            rows = [
+                (status.capitalize(), str(counts[status]),
+                 '\n'.join(previews[status]) + ('...' if counts[status] > 5 else ''))
+                for status in ('created', 'modified', 'deleted')
+            ]
+            rows.append(("Unchanged", str(counts['unchanged']), ""))
             
-            console.print(table)
+            print_table("Verification Results",
+                        [("Status", "cyan"), ("Count", "magenta"), ("Files", "green")], rows)
             
             # Show summary
-            total_changes = len(results['created']) + len(results['modified']) + len(results['deleted'])
+            total_changes = counts['created'] + counts['modified'] + counts['deleted']
             if total_changes == 0:
                 console.print("[green]✓ No changes detected - all files match baseline[/green]")
             else:
@@ -152,34 +199,38 @@ def verify(path: str, db: str, output_format: str):
 @click.option('--format', 'output_format', default='json', 
               type=click.Choice(['json', 'csv']), help='Export format')
 @click.option('--output', '-o', help='Output file path (defaults to stdout)')
-@click.option('--db', default='fim.db', help='Database file path')
+@click.option('--db', default='fim.db', type=click.Path(dir_okay=False), help='Database file path')
 def export(output_format: str, output: Optional[str], db: str):
     """Export database data."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    
     try:
         console.print(f"[bold blue]Exporting database: {db}[/bold blue]")
         
         # Initialize database
-        database = DatabaseManager(db)
+        database = DatabaseManager.get(db)
         
-        # Export data
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
-            task = progress.add_task("Exporting data...", total=None)
-            
-            data = database.export_data(output_format)
-            
-            progress.update(task, description="Export complete!")
-        
-        # Output data
+        # Stream rows straight to the destination instead of building one big string
         if output:
-            with open(output, 'w') as f:
-                f.write(data)
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                console=console
+            ) as progress:
+                task = progress.add_task("Exporting data...", total=None)
+                
+                # Exports keep non-ASCII paths unescaped, so never use the locale encoding
+                with open(output, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                    for chunk in database.iter_export(output_format):
+                        f.write(chunk)
+                
+                progress.update(task, description="Export complete!")
+            
             console.print(f"[green]✓ Data exported to: {output}[/green]")
         else:
-            console.print(data)
+            for chunk in database.iter_export(output_format):
+                click.echo(chunk, nl=False)
+            click.echo()
         
     except Exception as e:
         console.print(f"[red]Error exporting data: {e}[/red]")
@@ -187,47 +238,41 @@ def export(output_format: str, output: Optional[str], db: str):
 
 
 @main.command()
-@click.option('--db', default='fim.db', help='Database file path')
+@click.option('--db', default='fim.db', type=click.Path(dir_okay=False), help='Database file path')
 def status(db: str):
     """Show monitoring status and recent events."""
     try:
         console.print(f"[bold blue]File Integrity Monitor Status[/bold blue]")
         
         # Initialize database
-        database = DatabaseManager(db)
+        database = DatabaseManager.get(db)
         
         # Get statistics
-        baseline_count = len(database.get_baseline())
+        baseline_count = database.baseline_count()
         recent_events = database.get_events(limit=10)
         
         # Status table
-        status_table = Table(title="System Status")
-        status_table.add_column("Metric", style="cyan")
-        status_table.add_column("Value", style="magenta")
-        
-        status_table.add_row("Database", db)
-        status_table.add_row("Baseline Files", str(baseline_count))
-        status_table.add_row("Recent Events", str(len(recent_events)))
-        
-        console.print(status_table)
+        print_table("System Status", [("Metric", "cyan"), ("Value", "magenta")], [
+            ("Database", db),
+            ("Baseline Files", str(baseline_count)),
+            ("Recent Events", str(len(recent_events))),
+        ])
         
         # Recent events table
         if recent_events:
-            events_table = Table(title="Recent Events")
-            events_table.add_column("Timestamp", style="cyan")
-            events_table.add_column("Type", style="yellow")
-            events_table.add_column("File", style="green")
-            events_table.add_column("Agent", style="blue")
-            
-            for event in recent_events:
-                events_table.add_row(
-                    event.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                    event.event_type.value,
-                    event.file_path,
-                    event.agent_id
-                )
-            
-            console.print(events_table)
+            print_table(
+                "Recent Events",
+                [("Timestamp", "cyan"), ("Type", "yellow"), ("File", "green"), ("Agent", "blue")],
+                [
+                    (
+                        event.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                        event.event_type.value,
+                        event.file_path,
+                        event.agent_id
+                    )
+                    for event in recent_events
+                ]
+            )
         
     except Exception as e:
         console.print(f"[red]Error checking status: {e}[/red]")
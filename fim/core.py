@@ -3,130 +3,467 @@ Simplified core file monitoring functionality.
 """
 
 import os
+import re
 import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
-from pathlib import Path
-from typing import List, Optional, Dict, Any
+from functools import lru_cache, partial
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, List, Optional, Dict, Any, Pattern, Tuple
 
-from .models import FileRecord, FileEvent, EventType
+from .models import (DEFAULT_HASH_ALGORITHM, HASH_ALGORITHMS, SUPPORTED_HASH_ALGORITHMS,
+                     FileRecord, FileEvent, EventType)
 from .database import DatabaseManager
 
 
+@lru_cache(maxsize=32)
+def _compile_globs(patterns: Tuple[str, ...]) -> Pattern[str]:
+    """Translate and compile a set of globs once per distinct pattern set."""
+    import fnmatch
+    
+    # normcase mirrors fnmatch.fnmatch's case handling on Windows
+    return re.compile("|".join(
+        fnmatch.translate(os.path.normcase(pattern)) for pattern in patterns
+    ))
+
+
+def _make_excluder(exclude_patterns: Optional[List[str]]) -> Optional[Callable[[str, str], bool]]:
+    """Return a predicate telling whether a file is excluded.
+    
+    The predicate takes the file's full path and its name (as a DirEntry
+    provides them) and matches when either matches any glob. Returns None
+    when there is nothing to exclude so callers can skip the check entirely.
+    """
+    if not exclude_patterns:
+        return None
+    
+    match = _compile_globs(tuple(exclude_patterns)).match
+    normcase = os.path.normcase
+    
+    def is_excluded(file_path: str, name: str) -> bool:
+        return match(normcase(file_path)) is not None or match(normcase(name)) is not None
+    
+    return is_excluded
+
+
+@lru_cache(maxsize=32)
+def _compile_dir_globs(patterns: Tuple[str, ...]) -> Tuple[Optional[Pattern[str]],
+                                                          Optional[Pattern[str]]]:
+    """Compile the globs that exclude whole directories.
+    
+    Returns (path_regex, name_regex), either of which may be None:
+    
+    - Globs ending in "/*" or "/**": fnmatch's "*" also matches path
+      separators, so when a directory's path matches the part before the
+      trailing "/*" every file beneath it is excluded.
+    - Globs ending in a bare separator ("node_modules/", "*/build/") name
+      directories rather than files. Without another separator they match
+      a directory's name anywhere in the tree, otherwise its path.
+    """
+    import fnmatch
+    
+    path_prefixes = []
+    names = []
+    for pattern in map(os.path.normcase, patterns):
+        stripped = pattern.rstrip("*")
+        if not stripped.endswith(os.sep):
+            continue
+        
+        prefix = stripped[:-len(os.sep)]
+        if stripped == pattern and os.sep not in prefix:
+            names.append(prefix)
+        else:
+            path_prefixes.append(prefix)
+    
+    def compile_all(globs: List[str]) -> Optional[Pattern[str]]:
+        if not globs:
+            return None
+        return re.compile("|".join(fnmatch.translate(glob) for glob in globs))
+    
+    return compile_all(path_prefixes), compile_all(names)
+
+
+def _make_dir_excluder(exclude_patterns: Optional[List[str]]) -> Optional[Callable[[str, str], bool]]:
+    """Return a predicate telling whether a directory's whole subtree is excluded.
+    
+    Takes the directory's path and name, like the _make_excluder predicate.
+    Returns None when no pattern can exclude a directory.
+    """
+    if not exclude_patterns:
+        return None
+    
+    path_regex, name_regex = _compile_dir_globs(tuple(exclude_patterns))
+    if path_regex is None and name_regex is None:
+        return None
+    
+    normcase = os.path.normcase
+    
+    def is_excluded(dir_path: str, name: str) -> bool:
+        return ((path_regex is not None and path_regex.match(normcase(dir_path)) is not None)
+                or (name_regex is not None and name_regex.match(normcase(name)) is not None))
+    
+    return is_excluded
+
+
+def _require_hash_algorithm(hash_algorithm: str, what: str = "Hash algorithm {}"):
+    """Raise ValueError unless hash_algorithm can be computed on this host.
+    
+    what describes the algorithm's use in the message, with {} for its name.
+    """
+    if hash_algorithm in HASH_ALGORITHMS:
+        return
+    if hash_algorithm in SUPPORTED_HASH_ALGORITHMS:
+        raise ValueError(f"{what.format(hash_algorithm)} is not available on this host; "
+                         f"install the 'fast' extra (pip install blake3)")
+    raise ValueError(f"Unsupported hash algorithm: {hash_algorithm}")
+
+
 class BaselineManager:
     """Manages file baseline creation and verification."""
     
-    def __init__(self, database: DatabaseManager):
+    # Below this many files create_baseline hashes serially
+    PARALLEL_MIN_FILES = 64
+    
+    # Directories with at least this many files are hashed in inode order
+    INODE_SORT_MIN_ENTRIES = 16
+    
+    # Windows st_ctime is the creation time, which SetFileTime can rewrite,
+    # so stat metadata only vouches for unchanged content on POSIX
+    META_CACHE_DEFAULT = os.name == "posix"
+    
+    # Files changed this recently before hashing are not cached, like git's
+    # "racily clean" check: a same-size write within one timestamp tick
+    # would leave the stat key unchanged while the content differs
+    META_CACHE_RACY_NS = 2 * 10**9
+    
+    def __init__(self, database: DatabaseManager, max_workers: Optional[int] = None,
+                 hash_algorithm: str = DEFAULT_HASH_ALGORITHM):
         """Initialize baseline manager."""
+        _require_hash_algorithm(hash_algorithm)
+        
         self.database = database
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 2)
+        self.hash_algorithm = hash_algorithm
         self.logger = logging.getLogger(__name__)
     
-    def create_baseline(self, path: str, exclude_patterns: Optional[List[str]] = None) -> List[FileRecord]:
+    def create_baseline(self, path: str, exclude_patterns: Optional[List[str]] = None,
+                        progress_callback: Optional[Callable[[int, int], None]] = None,
+                        parallel: bool = True) -> List[FileRecord]:
         """Create baseline for specified path."""
-        path_obj = Path(path)
-        if not path_obj.exists():
+        if not os.path.exists(path):
             raise ValueError(f"Path does not exist: {path}")
         
         self.logger.info(f"Creating baseline for path: {path}")
         
+        # Walk lazily so directory listing overlaps with hashing on the pool.
+        # Peek at the first few paths to decide whether the pool is worth it.
+        walker = self._iter_files(path, exclude_patterns)
+        head = list(islice(walker, self.PARALLEL_MIN_FILES))
+        
+        # Small trees are hashed inline; spinning up the pool costs more than it saves
+        parallel = parallel and len(head) >= self.PARALLEL_MIN_FILES
+        
         file_records = []
-        total_files = 0
         processed_files = 0
+        discovered_files = 0
         
-        # Count total files first
-        for root, dirs, files in os.walk(path):
-            total_files += len(files)
+        def file_paths() -> Iterator[str]:
+            nonlocal discovered_files
+            for file_path in chain(head, walker):
+                discovered_files += 1
+                yield file_path
         
-        # Process files
-        for root, dirs, files in os.walk(path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                
-                # Check exclusion patterns
-                if self._should_exclude(file_path, exclude_patterns):
-                    continue
-                
-                try:
-                    record = FileRecord.from_path(file_path)
-                    file_records.append(record)
-                    processed_files += 1
-                    
-                    if processed_files % 100 == 0:
-                        self.logger.info(f"Processed {processed_files}/{total_files} files...")
-                        
-                except (OSError, ValueError) as e:
-                    self.logger.warning(f"Skipping file {file_path}: {e}")
+        # A new baseline always hashes everything, but seeds the metadata cache
+        cache_updates = []
+        hash_file = partial(self._hash_file, hash_algorithm=self.hash_algorithm,
+                            cache_updates=cache_updates)
+        
+        for file_path, future in self._submit_hashing(file_paths(), hash_file, parallel):
+            processed_files += 1
+            
+            try:
+                record = future.result()
+                # FileRecord carries an empty hash when its content could not be read
+                if not record.file_hash:
+                    raise ValueError("content could not be read")
+                file_records.append(record)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Skipping file {file_path}: {e}")
+            
+            # The total grows until the walk finishes, a window ahead of hashing
+            if progress_callback:
+                progress_callback(processed_files, discovered_files)
+            
+            if processed_files % 100 == 0:
+                self.logger.info(f"Processed {processed_files}/{discovered_files} files...")
         
         # Store baseline in database
         self.database.store_baseline(file_records)
+        self.database.store_meta_cache(cache_updates)
         
         self.logger.info(f"Baseline created successfully: {len(file_records)} files processed")
         return file_records
     
-    def _should_exclude(self, file_path: str, exclude_patterns: Optional[List[str]]) -> bool:
-        """Check if file should be excluded based on patterns."""
-        if not exclude_patterns:
-            return False
+    def _hash_file(self, file_path: str, hash_algorithm: str,
+                   cache_updates: Optional[List[tuple]] = None) -> FileRecord:
+        """Build a FileRecord, queuing its digest in cache_updates when given."""
+        if cache_updates is None:
+            return FileRecord.from_path(file_path, hash_algorithm)
         
-        import fnmatch
+        hash_started_ns = time.time_ns()
+        stat_info = self._stat(file_path)
+        record = FileRecord.from_path(file_path, hash_algorithm, stat_info)
+        if record.file_hash:
+            self._queue_cache_update(cache_updates, file_path, self._stat_key(stat_info, hash_algorithm),
+                                     bytes.fromhex(record.file_hash), hash_started_ns)
+        return record
+    
+    def _file_digest(self, file_path: str, hash_algorithm: str,
+                     meta_cache: Optional[Dict[str, Tuple[tuple, bytes]]] = None,
+                     cache_updates: Optional[List[tuple]] = None) -> bytes:
+        """Return a file's raw content digest, or b"" if its content could not be read.
         
-        for pattern in exclude_patterns:
-            if fnmatch.fnmatch(file_path, pattern):
-                return True
-            if fnmatch.fnmatch(os.path.basename(file_path), pattern):
-                return True
+        A digest from meta_cache is reused when the file's size, mtime, ctime
+        and inode are unchanged; on POSIX ctime and inode cannot be reset from
+        user space the way mtime can. Freshly computed digests are queued in
+        cache_updates for the caller to store.
+        """
+        if meta_cache is None:
+            return bytes.fromhex(FileRecord.from_path(file_path, hash_algorithm).file_hash)
         
-        return False
+        hash_started_ns = time.time_ns()
+        stat_info = self._stat(file_path)
+        stat_key = self._stat_key(stat_info, hash_algorithm)
+        cached = meta_cache.get(file_path)
+        if cached is not None and cached[0] == stat_key:
+            return cached[1]
+        
+        digest = bytes.fromhex(FileRecord.from_path(file_path, hash_algorithm, stat_info).file_hash)
+        if cache_updates is not None:
+            self._queue_cache_update(cache_updates, file_path, stat_key, digest, hash_started_ns)
+        return digest
     
-    def verify_baseline(self, path: str, exclude_patterns: Optional[List[str]] = None) -> Dict[str, Any]:
-        """Verify current state against baseline."""
-        self.logger.info(f"Verifying baseline for path: {path}")
+    @staticmethod
+    def _stat(file_path: str) -> os.stat_result:
+        """Stat a file, raising ValueError like FileRecord.from_path() does."""
+        try:
+            return os.stat(file_path)
+        except OSError as e:
+            raise ValueError(f"Could not read file {file_path}: {e}")
+    
+    @staticmethod
+    def _stat_key(stat_info: os.stat_result, hash_algorithm: str) -> tuple:
+        """Return the metadata cache key (file_size, mtime_ns, ctime_ns, inode, hash_algorithm)."""
+        return (stat_info.st_size, stat_info.st_mtime_ns, stat_info.st_ctime_ns,
+                stat_info.st_ino, hash_algorithm)
+    
+    def _queue_cache_update(self, cache_updates: List[tuple], file_path: str, stat_key: tuple,
+                            digest: bytes, hash_started_ns: int):
+        """Queue a digest for the metadata cache unless the file changed too recently.
+        
+        A write landing in the same timestamp tick as the hash would leave the
+        metadata unchanged, so files changed within META_CACHE_RACY_NS of
+        hashing are not cached.
+        """
+        changed_ns = max(stat_key[1], stat_key[2])
+        if digest and changed_ns < hash_started_ns - self.META_CACHE_RACY_NS:
+            cache_updates.append((file_path, *stat_key, digest))
+    
+    def _submit_hashing(self, file_paths: Iterable[str], hash_file: Callable[[str], Any],
+                        parallel: bool = True) -> Iterator[Tuple[str, "Future[Any]"]]:
+        """Hash files on a thread pool, yielding (file_path, future) in input order."""
+        if not parallel:
+            for file_path in file_paths:
+                future = Future()
+                try:
+                    future.set_result(hash_file(file_path))
+                except (OSError, ValueError) as e:
+                    future.set_exception(e)
+                yield file_path, future
+            return
         
-        # Get current state
-        current_records = {}
-        path_obj = Path(path)
+        window = self.max_workers * 4
+        buffer_limit = window * 16
+        pending = deque()
+        in_flight = set()
         
-        for root, dirs, files in os.walk(path):
-            for file in files:
-                file_path = os.path.join(root, file)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for file_path in file_paths:
+                future = executor.submit(hash_file, file_path)
+                pending.append((file_path, future))
+                in_flight.add(future)
                 
-                if self._should_exclude(file_path, exclude_patterns):
-                    continue
+                # Only unfinished futures count against the window, so one large
+                # file at the head of the queue does not leave the other workers
+                # idle; finished results queue up behind it instead.
+                if len(in_flight) >= window:
+                    in_flight = wait(in_flight, return_when=FIRST_COMPLETED).not_done
                 
-                try:
-                    record = FileRecord.from_path(file_path)
-                    current_records[file_path] = record
-                except (OSError, ValueError) as e:
-                    self.logger.warning(f"Could not read file {file_path}: {e}")
+                while pending and pending[0][1].done():
+                    yield pending.popleft()
+                
+                # Bound how many finished results can wait behind a slow head
+                if len(pending) >= buffer_limit:
+                    yield pending.popleft()
+            
+            while pending:
+                yield pending.popleft()
+    
+    def _iter_files(self, path: str, exclude_patterns: Optional[List[str]] = None) -> Iterator[str]:
+        """Yield paths of files under path that are not excluded.
         
-        # Get baseline
-        baseline_records = {r.file_path: r for r in self.database.get_baseline()}
+        Uses os.scandir so file/directory checks come from the directory
+        listing itself. Like os.walk, symlinked directories are not followed
+        and unreadable directories are skipped. On POSIX, files in larger
+        directories are yielded in inode order, which roughly follows on-disk
+        layout and cuts seeking on rotating disks.
+        """
+        is_excluded = _make_excluder(exclude_patterns)
+        is_dir_excluded = _make_dir_excluder(exclude_patterns)
+        pending = [path]
         
-        # Compare and find differences
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    subdirs = []
+                    files = []
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        
+                        if is_dir:
+                            if entry.is_symlink():
+                                continue
+                            
+                            # Prune subtrees whose every file would be excluded
+                            if is_dir_excluded is not None and is_dir_excluded(entry.path, entry.name):
+                                continue
+                            
+                            subdirs.append(entry.path)
+                            continue
+                        
+                        # Check exclusion patterns
+                        if is_excluded is not None and is_excluded(entry.path, entry.name):
+                            continue
+                        
+                        files.append(entry)
+            except OSError as e:
+                self.logger.warning(f"Could not list directory {directory}: {e}")
+                continue
+            
+            # DirEntry.inode() comes free from the listing on POSIX only
+            if os.name == "posix" and len(files) >= self.INODE_SORT_MIN_ENTRIES:
+                files.sort(key=os.DirEntry.inode)
+            
+            for entry in files:
+                yield entry.path
+            
+            # Visit subdirectories in listing order
+            pending.extend(reversed(subdirs))
+    
+    def verify_baseline(self, path: str, exclude_patterns: Optional[List[str]] = None,
+                        parallel: bool = True,
+                        use_meta_cache: Optional[bool] = None) -> Dict[str, Any]:
+        """Verify current state against baseline."""
         results = {
-            "total_files": len(current_records),
-            "baseline_files": len(baseline_records),
+            "total_files": 0,
+            "baseline_files": 0,
             "created": [],
             "deleted": [],
             "modified": [],
             "unchanged": [],
         }
         
-        for file_path, current_record in current_records.items():
-            if file_path not in baseline_records:
-                results["created"].append(file_path)
+        for status, file_path in self.iter_verify_baseline(path, exclude_patterns, parallel,
+                                                             use_meta_cache):
+            results[status].append(file_path)
+        
+        results["total_files"] = (len(results["created"]) + len(results["modified"])
+                                  + len(results["unchanged"]))
+        results["baseline_files"] = (len(results["deleted"]) + len(results["modified"])
+                                     + len(results["unchanged"]))
+        
+        return results
+    
+    def iter_verify_baseline(self, path: str, exclude_patterns: Optional[List[str]] = None,
+                             parallel: bool = True,
+                             use_meta_cache: Optional[bool] = None) -> Iterator[Tuple[str, str]]:
+        """Yield (status, file_path) pairs comparing current state against baseline.
+        
+        Status is one of "created", "modified", "unchanged" or "deleted". Only
+        the baseline's path -> hash map is held in memory; current files are
+        compared as they are walked. With use_meta_cache, files whose size,
+        mtime, ctime and inode are unchanged since they were last hashed are
+        not read again. It defaults to on only on POSIX, see _file_digest().
+        """
+        self.logger.info(f"Verifying baseline for path: {path}")
+        
+        if use_meta_cache is None:
+            use_meta_cache = self.META_CACHE_DEFAULT
+        
+        # Get baseline digests only; full records are not needed to compare
+        baseline_hashes = self.database.get_baseline_hashes()
+        counts = {"created": 0, "modified": 0, "unchanged": 0, "deleted": 0}
+        
+        # Fail loudly rather than report every file as unreadable and deleted
+        algorithms = {algorithm for _, algorithm in baseline_hashes.values()}
+        for algorithm in sorted(algorithms):
+            _require_hash_algorithm(algorithm, "Baseline hash algorithm {}")
+        
+        # Hash each file with its baseline algorithm so it is digested once, on the pool
+        cache_updates = []
+        meta_cache = self.database.get_meta_cache(path) if use_meta_cache else None
+        hash_with = partial(self._file_digest, meta_cache=meta_cache, cache_updates=cache_updates)
+        if len(algorithms) > 1:
+            # Mixed baselines: a read-only map, so worker threads can look up safely
+            file_algorithms = {file_path: algorithm
+                               for file_path, (_, algorithm) in baseline_hashes.items()}
+            
+            def hash_file(file_path: str) -> bytes:
+                return hash_with(file_path, file_algorithms.get(file_path, self.hash_algorithm))
+        else:
+            hash_file = partial(hash_with, hash_algorithm=algorithms.pop() if algorithms
+                                else self.hash_algorithm)
+        
+        file_paths = self._iter_files(path, exclude_patterns)
+        for file_path, future in self._submit_hashing(file_paths, hash_file, parallel):
+            baseline_entry = baseline_hashes.pop(file_path, None)
+            if meta_cache is not None:
+                # This file's own lookup is done; what remains at the end is stale
+                meta_cache.pop(file_path, None)
+            try:
+                current_digest = future.result()
+                if not current_digest:
+                    raise ValueError("content could not be read")
+            except (OSError, ValueError) as e:
+                # A baselined file that can no longer be read (or is now a dangling
+                # symlink) cannot be shown to be intact, so it counts as modified
+                self.logger.warning(f"Could not read file {file_path}: {e}")
+                current_digest = None
+            
+            if baseline_entry is None:
+                status = "created"
+            elif current_digest is None:
+                status = "modified"
             else:
-                baseline_record = baseline_records[file_path]
-                
-                if current_record.file_hash != baseline_record.file_hash:
-                    results["modified"].append(file_path)
-                else:
-                    results["unchanged"].append(file_path)
+                status = "modified" if current_digest != baseline_entry[0] else "unchanged"
+            
+            counts[status] += 1
+            yield status, file_path
         
-        for file_path in baseline_records:
-            if file_path not in current_records:
-                results["deleted"].append(file_path)
+        # Anything left in the baseline was not seen on disk
+        for file_path in baseline_hashes:
+            counts["deleted"] += 1
+            yield "deleted", file_path
         
-        self.logger.info(f"Verification complete: {len(results['modified'])} modified, "
-                        f"{len(results['created'])} created, {len(results['deleted'])} deleted")
+        # Cached entries under path that the walk did not reach (deleted or now
+        # excluded files) are pruned along with storing the new ones
+        self.database.store_meta_cache(cache_updates, stale_paths=meta_cache or ())
         
-        return results
+        self.logger.info(f"Verification complete: {counts['modified']} modified, "
+                        f"{counts['created']} created, {counts['deleted']} deleted")
@@ -2,187 +2,539 @@
 Simplified database management for File Integrity Monitor.
 """
 
+import os
 import sqlite3
 import json
-from datetime import datetime
+import logging
+import threading
+import weakref
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from contextlib import contextmanager
 
 from .models import FileRecord, FileEvent, EventType
 
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    # orjson is an optional speedup; the stdlib json module is used otherwise
+    orjson = None
+
+# Statements built once so the hot paths never format SQL
+# UPSERTs update rows in place, and only when a value actually changed, so
+# re-storing an unchanged file is a no-op instead of a delete plus insert
+BASELINE_INSERT_SQL = """
+    INSERT INTO baseline
+    (file_path, file_hash, file_size, mtime, permissions, owner, group_name, hash_algorithm)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(file_path) DO UPDATE SET
+        file_hash = excluded.file_hash,
+        file_size = excluded.file_size,
+        mtime = excluded.mtime,
+        permissions = excluded.permissions,
+        owner = excluded.owner,
+        group_name = excluded.group_name,
+        hash_algorithm = excluded.hash_algorithm
+    WHERE baseline.file_hash IS NOT excluded.file_hash
+       OR baseline.file_size IS NOT excluded.file_size
+       OR baseline.mtime IS NOT excluded.mtime
+       OR baseline.permissions IS NOT excluded.permissions
+       OR baseline.owner IS NOT excluded.owner
+       OR baseline.group_name IS NOT excluded.group_name
+       OR baseline.hash_algorithm IS NOT excluded.hash_algorithm
+"""
+
+BASELINE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS baseline (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        file_path TEXT UNIQUE NOT NULL,
+        file_hash BLOB NOT NULL,
+        file_size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        permissions INTEGER NOT NULL,
+        owner TEXT NOT NULL,
+        group_name TEXT NOT NULL,
+        hash_algorithm TEXT NOT NULL DEFAULT 'sha256'
+    )
+"""
+
+EVENTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_type TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        timestamp INTEGER NOT NULL,
+        agent_id TEXT NOT NULL
+    )
+"""
+
+EVENT_INSERT_SQL = """
+    INSERT INTO events (event_type, file_path, timestamp, agent_id)
+    VALUES (?, ?, ?, ?)
+"""
+
+BASELINE_SELECT_SQL = """
+    SELECT file_path, file_hash, file_size, mtime, permissions, owner, group_name, hash_algorithm
+    FROM baseline
+"""
+
+EVENTS_SELECT_SQL = """
+    SELECT event_type, file_path, timestamp, agent_id
+    FROM events ORDER BY timestamp DESC LIMIT ?
+"""
+
+# Digests are stored as raw BLOBs (half the size of hex TEXT) and exposed as hex
+def _hash_to_blob(file_hash: str) -> bytes:
+    """Convert a hex digest to its stored form."""
+    return bytes.fromhex(file_hash)
+
+
+# Plain dict lookup: calling EventType(value) goes through EnumMeta.__call__
+_EVENT_TYPES = {event_type.value: event_type for event_type in EventType}
+
+
+# Event timestamps are stored as integer microseconds since the Unix epoch
+# (naive UTC, matching FileEvent), which sort and index as plain integers
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_epoch_us(timestamp: datetime) -> int:
+    """Convert a naive-UTC (or aware) datetime to epoch microseconds."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+
+def _from_epoch_us(value: int) -> datetime:
+    """Convert epoch microseconds back to a naive-UTC datetime."""
+    return _EPOCH + timedelta(microseconds=value)
+
+
+META_CACHE_INSERT_SQL = """
+    INSERT INTO meta_cache
+    (file_path, file_size, mtime_ns, ctime_ns, inode, hash_algorithm, file_hash)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(file_path) DO UPDATE SET
+        file_size = excluded.file_size,
+        mtime_ns = excluded.mtime_ns,
+        ctime_ns = excluded.ctime_ns,
+        inode = excluded.inode,
+        hash_algorithm = excluded.hash_algorithm,
+        file_hash = excluded.file_hash
+    WHERE meta_cache.file_size IS NOT excluded.file_size
+       OR meta_cache.mtime_ns IS NOT excluded.mtime_ns
+       OR meta_cache.ctime_ns IS NOT excluded.ctime_ns
+       OR meta_cache.inode IS NOT excluded.inode
+       OR meta_cache.hash_algorithm IS NOT excluded.hash_algorithm
+       OR meta_cache.file_hash IS NOT excluded.file_hash
+"""
+
+
+def dump_json(data: Any) -> str:
+    """Serialize data as JSON with a two-space indent, keeping non-ASCII text unescaped.
+    
+    The output is the same with or without orjson installed. Undecodable file
+    names (surrogate-escaped by os.fsdecode) cannot be written as UTF-8, so
+    data containing them falls back to ASCII \\u escapes.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+        except TypeError:
+            # orjson.JSONEncodeError, e.g. for surrogates; retry with json
+            pass
+    
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    try:
+        text.encode("utf-8")
+    except UnicodeEncodeError:
+        return json.dumps(data, indent=2)
+    return text
+
 
 class DatabaseManager:
     """Simple SQLite database manager."""
     
+    # Per-connection tuning applied when the connection is opened
+    CONNECTION_PRAGMAS = (
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA cache_size=-65536",
+        "PRAGMA busy_timeout=5000",
+    )
+    
+    # Live managers keyed by resolved database path, see get()
+    _instances: "weakref.WeakValueDictionary[object, DatabaseManager]" = weakref.WeakValueDictionary()
+    
     def __init__(self, db_path: str = "fim.db"):
-        """Initialize database manager."""
+        """Initialize database manager.
+        
+        db_path may also be ":memory:" or an SQLite "file:" URI such as
+        "file::memory:?cache=shared". An in-memory database lives as long as
+        the manager's connection.
+        """
         self.db_path = Path(db_path)
+        # Path() would collapse a URI's slashes, so keep the original string
+        self._database = str(db_path)
+        self._uri = self._database.startswith("file:")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
         self._init_database()
     
+    @classmethod
+    def get(cls, db_path: str = "fim.db") -> "DatabaseManager":
+        """Return the shared manager for db_path, creating it on first use."""
+        db_path = str(db_path)
+        is_file = db_path != ":memory:" and not db_path.startswith("file:")
+        key = Path(db_path).resolve() if is_file else db_path
+        manager = cls._instances.get(key)
+        if manager is None:
+            manager = cls(db_path)
+            cls._instances[key] = manager
+        return manager
+    
     def _init_database(self):
         """Initialize database tables."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
+            # WAL is persistent in the database file, so set it once here
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
             # Create baseline table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS baseline (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    file_path TEXT UNIQUE NOT NULL,
-                    file_hash TEXT NOT NULL,
-                    file_size INTEGER NOT NULL,
-                    mtime REAL NOT NULL,
-                    permissions INTEGER NOT NULL,
-                    owner TEXT NOT NULL,
-                    group_name TEXT NOT NULL
+            cursor.execute(BASELINE_TABLE_SQL)
+            
+            # Databases created before hash_algorithm existed hold SHA-256 digests
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(baseline)")}
+            if "hash_algorithm" not in columns:
+                cursor.execute(
+                    "ALTER TABLE baseline ADD COLUMN hash_algorithm TEXT NOT NULL DEFAULT 'sha256'"
                 )
-            """)
+            
+            # Older databases stored hex digests as TEXT; rebuild with raw BLOB digests
+            if self._column_type(cursor, "baseline", "file_hash") == "TEXT":
+                self._rebuild_table(cursor, "baseline", BASELINE_TABLE_SQL, 2, _hash_to_blob)
             
             # Create events table
+            cursor.execute(EVENTS_TABLE_SQL)
+            
+            # Older databases stored ISO-8601 TEXT timestamps. TEXT affinity would
+            # turn integers back into strings, so the table has to be rebuilt.
+            if self._column_type(cursor, "events", "timestamp") == "TEXT":
+                self._rebuild_table(cursor, "events", EVENTS_TABLE_SQL, 3,
+                                    lambda value: _to_epoch_us(datetime.fromisoformat(value)))
+            
+            # The metadata cache is disposable, so an old TEXT-hash layout is just dropped
+            if self._column_type(cursor, "meta_cache", "file_hash") == "TEXT":
+                cursor.execute("DROP TABLE meta_cache")
+            
+            # Create metadata cache table: content hashes keyed by stat metadata
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    event_type TEXT NOT NULL,
-                    file_path TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    agent_id TEXT NOT NULL
+                CREATE TABLE IF NOT EXISTS meta_cache (
+                    file_path TEXT PRIMARY KEY,
+                    file_size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    ctime_ns INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    hash_algorithm TEXT NOT NULL,
+                    file_hash BLOB NOT NULL
                 )
             """)
             
-            # Create indexes for performance
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_baseline_path ON baseline(file_path)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_path ON events(file_path)")
+            # Create indexes for performance. baseline.file_path is already
+            # indexed by its UNIQUE constraint, so an extra index only slows inserts.
+            cursor.execute("DROP INDEX IF EXISTS idx_baseline_path")
+            cursor.execute("DROP INDEX IF EXISTS idx_events_path")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_events_path_ts ON events(file_path, timestamp DESC)"
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_ts ON events(timestamp DESC)")
             
             conn.commit()
     
+    @staticmethod
+    def _column_type(cursor: sqlite3.Cursor, table: str, column: str) -> str:
+        """Return the declared type of a column, or "" if it does not exist."""
+        for row in cursor.execute(f"PRAGMA table_info({table})"):
+            if row[1] == column:
+                return row[2].upper()
+        return ""
+    
+    @staticmethod
+    def _rebuild_table(cursor: sqlite3.Cursor, table: str, create_sql: str,
+                       column_index: int, convert: Callable[[Any], Any]):
+        """Recreate a table from create_sql, converting one column of every row.
+        
+        Used when a column's declared type changes, since SQLite cannot alter
+        it in place. column_index is the position in the table's column order.
+        Rows whose value cannot be converted are logged and dropped; any other
+        failure rolls the whole rebuild back, leaving the old table intact.
+        """
+        def converted_rows(rows: List[tuple]) -> Iterator[tuple]:
+            for row in rows:
+                try:
+                    value = convert(row[column_index])
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Dropping {table} row {row[0]} during migration: {e}")
+                    continue
+                yield row[:column_index] + (value,) + row[column_index + 1:]
+        
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+            cursor.execute(create_sql)
+            rows = cursor.execute(f"SELECT * FROM {table}_old").fetchall()
+            if rows:
+                placeholders = ", ".join("?" * len(rows[0]))
+                cursor.executemany(f"INSERT INTO {table} VALUES ({placeholders})",
+                                   converted_rows(rows))
+            # Dropping the old table also drops its indexes, which are recreated afterwards
+            cursor.execute(f"DROP TABLE {table}_old")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        cursor.execute("COMMIT")
+    
     @contextmanager
     def _get_connection(self):
-        """Get database connection."""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            yield conn
-        finally:
-            conn.close()
+        """Get the long-lived database connection, opening it on first use.
+        
+        The connection runs in autocommit mode (explicit transactions go
+        through transaction()) and is guarded by a re-entrant lock so it can
+        be shared between threads.
+        """
+        with self._lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self._database, uri=self._uri,
+                                       check_same_thread=False, isolation_level=None)
+                for pragma in self.CONNECTION_PRAGMAS:
+                    conn.execute(pragma)
+                self._conn = conn
+            yield self._conn
+    
+    def close(self):
+        """Close the database connection; it is reopened on next use."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    @contextmanager
+    def transaction(self):
+        """Get a connection wrapped in a single immediate transaction."""
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
     
     def store_baseline(self, file_records: List[FileRecord]):
         """Store baseline file records."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            for record in file_records:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO baseline 
-                    (file_path, file_hash, file_size, mtime, permissions, owner, group_name)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    record.file_path, record.file_hash, record.file_size, record.mtime,
-                    record.permissions, record.owner, record.group
-                ))
-            
-            conn.commit()
+        with self.transaction() as conn:
+            conn.executemany(BASELINE_INSERT_SQL, (
+                (
+                    record.file_path, _hash_to_blob(record.file_hash), record.file_size, record.mtime,
+                    record.permissions, record.owner, record.group, record.hash_algorithm
+                )
+                for record in file_records
+            ))
     
     def get_baseline(self, file_path: Optional[str] = None) -> List[FileRecord]:
         """Retrieve baseline records."""
+        return list(self.iter_baseline(file_path))
+    
+    def iter_baseline(self, file_path: Optional[str] = None) -> Iterator[FileRecord]:
+        """Yield baseline records without loading them all into memory."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
             if file_path:
-                cursor.execute("SELECT * FROM baseline WHERE file_path = ?", (file_path,))
+                cursor.execute(BASELINE_SELECT_SQL + " WHERE file_path = ?", (file_path,))
             else:
-                cursor.execute("SELECT * FROM baseline")
-            
-            records = []
-            for row in cursor.fetchall():
-                record = FileRecord(
-                    file_path=row[1],
-                    file_hash=row[2],
-                    file_size=row[3],
-                    mtime=row[4],
-                    permissions=row[5],
-                    owner=row[6],
-                    group=row[7],
-                )
-                records.append(record)
+                cursor.execute(BASELINE_SELECT_SQL)
             
-            return records
+            # Columns are selected in FileRecord field order, so rows map positionally
+            for file_path, file_hash, *rest in cursor:
+                yield FileRecord(file_path, file_hash.hex(), *rest)
+    
+    def get_meta_cache(self, path: Optional[str] = None) -> Dict[str, Tuple[Tuple[int, int, int, int, str], bytes]]:
+        """Load the metadata cache as {file_path: (stat_key, digest)}.
+        
+        stat_key is (file_size, mtime_ns, ctime_ns, inode, hash_algorithm).
+        With path, only entries for files under that directory are loaded.
+        """
+        query = "SELECT * FROM meta_cache"
+        params: Tuple[str, ...] = ()
+        if path is not None:
+            # Every path starting with prefix sorts in [prefix, upper), so this
+            # is a range scan of the primary key index
+            prefix = path if path.endswith(os.sep) else path + os.sep
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            query += " WHERE file_path >= ? AND file_path < ?"
+            params = (prefix, upper)
+        
+        with self._get_connection() as conn:
+            try:
+                cursor = conn.execute(query, params)
+            except UnicodeEncodeError:
+                # An undecodable path has no stored entries to load
+                return {}
+            return {row[0]: (tuple(row[1:6]), row[6]) for row in cursor}
+    
+    def store_meta_cache(self, entries: Iterable[Tuple[str, int, int, int, int, str, bytes]],
+                         stale_paths: Iterable[str] = ()):
+        """Upsert metadata cache rows of (file_path, *stat_key, digest) and delete stale_paths.
+        
+        The cache is only an optimization, so entries whose path SQLite cannot
+        store (undecodable file names) are skipped and a failed write is
+        logged rather than raised.
+        """
+        def storable_rows() -> Iterator[tuple]:
+            for entry in entries:
+                try:
+                    entry[0].encode("utf-8")
+                except UnicodeEncodeError:
+                    continue
+                yield entry
+        
+        try:
+            with self.transaction() as conn:
+                conn.executemany("DELETE FROM meta_cache WHERE file_path = ?",
+                                 ((file_path,) for file_path in stale_paths))
+                conn.executemany(META_CACHE_INSERT_SQL, storable_rows())
+        except sqlite3.Error as e:
+            logger.warning(f"Could not update the metadata cache: {e}")
+    
+    def get_baseline_hashes(self) -> Dict[str, Tuple[bytes, str]]:
+        """Load {file_path: (digest, hash_algorithm)} for the whole baseline.
+        
+        Lighter than get_baseline() when only content comparison is needed:
+        digests stay raw bytes (half the size of hex strings) and rows share
+        one string object per algorithm name.
+        """
+        algorithms: Dict[str, str] = {}
+        with self._get_connection() as conn:
+            cursor = conn.execute("SELECT file_path, file_hash, hash_algorithm FROM baseline")
+            return {
+                file_path: (digest, algorithms.setdefault(algorithm, algorithm))
+                for file_path, digest, algorithm in cursor
+            }
     
     def store_event(self, event: FileEvent):
         """Store a file system event."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO events (event_type, file_path, timestamp, agent_id)
-                VALUES (?, ?, ?, ?)
-            """, (
-                event.event_type.value, event.file_path,
-                event.timestamp.isoformat(), event.agent_id
+        self.store_events([event])
+    
+    def store_events(self, events: Iterable[FileEvent]):
+        """Store a batch of file system events in a single transaction."""
+        with self.transaction() as conn:
+            conn.executemany(EVENT_INSERT_SQL, (
+                (
+                    event.event_type.value, event.file_path,
+                    _to_epoch_us(event.timestamp), event.agent_id
+                )
+                for event in events
             ))
-            
-            conn.commit()
     
     def get_events(self, limit: Optional[int] = None) -> List[FileEvent]:
         """Retrieve events."""
+        return list(self.iter_events(limit))
+    
+    def iter_events(self, limit: Optional[int] = None) -> Iterator[FileEvent]:
+        """Yield events, newest first, without loading them all into memory."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
-            query = "SELECT * FROM events ORDER BY timestamp DESC"
-            if limit:
-                query += f" LIMIT {limit}"
-            
-            cursor.execute(query)
-            
-            events = []
-            for row in cursor.fetchall():
-                event = FileEvent(
-                    event_type=EventType(row[1]),
-                    file_path=row[2],
-                    timestamp=datetime.fromisoformat(row[3]),
-                    agent_id=row[4]
-                )
-                events.append(event)
+            # A negative LIMIT means "no limit" in SQLite, so one statement serves both
+            cursor.execute(EVENTS_SELECT_SQL, (limit if limit else -1,))
             
-            return events
+            for event_type, file_path, timestamp, agent_id in cursor:
+                yield FileEvent(_EVENT_TYPES[event_type], file_path,
+                                _from_epoch_us(timestamp), agent_id)
+    
+    def baseline_count(self) -> int:
+        """Count baseline records without loading them."""
+        return self._count_rows("baseline")
+    
+    def _count_rows(self, table: str) -> int:
+        """Count rows in a table without fetching them."""
+        with self._get_connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    
+    @staticmethod
+    def _record_to_dict(record: FileRecord) -> dict:
+        """Convert a baseline record to its export representation."""
+        return {
+            "file_path": record.file_path,
+            "file_hash": record.file_hash,
+            "file_size": record.file_size,
+            "mtime": record.mtime,
+            "permissions": record.permissions,
+            "owner": record.owner,
+            "group": record.group,
+            "hash_algorithm": record.hash_algorithm,
+        }
+    
+    @staticmethod
+    def _event_to_dict(event: FileEvent) -> dict:
+        """Convert an event to its export representation."""
+        return {
+            "event_type": event.event_type.value,
+            "file_path": event.file_path,
+            "timestamp": event.timestamp.isoformat(),
+            "agent_id": event.agent_id,
+        }
     
     def export_data(self, format_type: str = "json") -> str:
         """Export database data."""
-        baseline = self.get_baseline()
-        events = self.get_events()
+        return "".join(self.iter_export(format_type))
+    
+    def iter_export(self, format_type: str = "json") -> Iterator[str]:
+        """Export database data as a stream of text chunks, one row at a time."""
+        if format_type.lower() == "csv":
+            return self._iter_export_csv()
+        return self._iter_export_json()
+    
+    def _iter_export_json(self) -> Iterator[str]:
+        """Export data as JSON, streamed in json.dumps(..., indent=2) layout.
         
-        data = {
+        Like the rows, the header keeps non-ASCII text unescaped, so the
+        result equals json.dumps(data, indent=2, ensure_ascii=False).
+        """
+        header = {
             "export_timestamp": datetime.utcnow().isoformat(),
-            "baseline_count": len(baseline),
-            "events_count": len(events),
-            "baseline": [
-                {
-                    "file_path": record.file_path,
-                    "file_hash": record.file_hash,
-                    "file_size": record.file_size,
-                    "mtime": record.mtime,
-                    "permissions": record.permissions,
-                    "owner": record.owner,
-                    "group": record.group,
-                }
-                for record in baseline
-            ],
-            "events": [
-                {
-                    "event_type": event.event_type.value,
-                    "file_path": event.file_path,
-                    "timestamp": event.timestamp.isoformat(),
-                    "agent_id": event.agent_id,
-                }
-                for event in events
-            ],
+            "baseline_count": self.baseline_count(),
+            "events_count": self._count_rows("events"),
         }
+        yield json.dumps(header, indent=2, ensure_ascii=False)[:-2] + ","
         
-        if format_type.lower() == "csv":
-            return self._export_csv(data)
-        else:
-            return json.dumps(data, indent=2)
+        sections = (
+            ("baseline", map(self._record_to_dict, self.iter_baseline())),
+            ("events", map(self._event_to_dict, self.iter_events())),
+        )
+        for index, (name, items) in enumerate(sections):
+            yield f'\n  "{name}": ['
+            separator = "\n    "
+            for item in items:
+                # Indent the nested object; its own lines are never empty
+                yield separator + dump_json(item).replace("\n", "\n    ")
+                separator = ",\n    "
+            # json.dumps renders an empty list as []
+            yield "]" if separator == "\n    " else "\n  ]"
+            if index < len(sections) - 1:
+                yield ","
+        
+        yield "\n}"
     
-    def _export_csv(self, data: dict) -> str:
+    def _iter_export_csv(self) -> Iterator[str]:
         """Export data as CSV."""
         import csv
         import io
@@ -190,19 +542,27 @@ class DatabaseManager:
         output = io.StringIO()
         writer = csv.writer(output)
         
-        # Write baseline
-        if data["baseline"]:
-            writer.writerow(["BASELINE"])
-            writer.writerow(data["baseline"][0].keys())
-            for record in data["baseline"]:
-                writer.writerow(record.values())
-            writer.writerow([])
-        
-        # Write events
-        if data["events"]:
-            writer.writerow(["EVENTS"])
-            writer.writerow(data["events"][0].keys())
-            for event in data["events"]:
-                writer.writerow(event.values())
+        def flush() -> str:
+            chunk = output.getvalue()
+            output.seek(0)
+            output.truncate()
+            return chunk
         
-        return output.getvalue()
+        sections = (
+            ("BASELINE", map(self._record_to_dict, self.iter_baseline())),
+            ("EVENTS", map(self._event_to_dict, self.iter_events())),
+        )
+        for title, items in sections:
+            first = True
+            for item in items:
+                if first:
+                    writer.writerow([title])
+                    writer.writerow(item.keys())
+                    first = False
+                writer.writerow(item.values())
+                yield flush()
+            
+            # The baseline section is followed by a blank separator row
+            if title == "BASELINE" and not first:
+                writer.writerow([])
+                yield flush()
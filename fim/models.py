@@ -7,6 +7,38 @@ import os
 from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+try:
+    import blake3
+except ImportError:
+    # blake3 is an optional speedup; hashlib's SHA-256 is always available
+    blake3 = None
+
+try:
+    import pwd
+    import grp
+except ImportError:
+    # Windows has no pwd/grp; owners are recorded as numeric ids
+    pwd = grp = None
+
+# Direct constructors: hashlib.sha256 is OpenSSL's EVP implementation (SHA-NI
+# where the CPU has it) and skips the name lookup hashlib.new() does per call
+_HASH_CONSTRUCTORS = {"sha256": hashlib.sha256}
+if blake3 is not None:
+    _HASH_CONSTRUCTORS["blake3"] = blake3.blake3
+
+# Every algorithm a baseline may record, and the subset usable on this host.
+# The default does not depend on what happens to be installed, so databases
+# stay verifiable when moved between hosts; blake3 is an explicit choice.
+SUPPORTED_HASH_ALGORITHMS = ("sha256", "blake3")
+HASH_ALGORITHMS = tuple(name for name in SUPPORTED_HASH_ALGORITHMS if name in _HASH_CONSTRUCTORS)
+DEFAULT_HASH_ALGORITHM = "sha256"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Windows would otherwise open the raw descriptor in text mode
+_READ_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0)
 
 
 class EventType(Enum):
@@ -17,7 +49,24 @@ class EventType(Enum):
     BASELINE = "baseline"
 
 
-@dataclass
+@lru_cache(maxsize=4096)
+def _owner_group(uid: int, gid: int) -> Tuple[str, str]:
+    """Resolve a uid/gid pair to owner and group names.
+    
+    Cached because the same few ids repeat across a whole tree and each
+    uncached lookup may go through NSS (LDAP, SSSD, ...).
+    """
+    if pwd is None or grp is None:
+        return str(uid), str(gid)
+    
+    try:
+        return pwd.getpwuid(uid).pw_name, grp.getgrgid(gid).gr_name
+    except KeyError:
+        # Fallback for missing user/group info
+        return str(uid), str(gid)
+
+
+@dataclass(slots=True)
 class FileRecord:
     """Represents a file record in the baseline."""
     file_path: str
@@ -27,26 +76,27 @@ class FileRecord:
     permissions: int
     owner: str
     group: str
+    hash_algorithm: str = "sha256"
     
     @classmethod
-    def from_path(cls, file_path: str) -> "FileRecord":
-        """Create a FileRecord from a file path."""
+    def from_path(cls, file_path: str, hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+                  stat_info: Optional[os.stat_result] = None,
+                  file_hash: Optional[str] = None) -> "FileRecord":
+        """Create a FileRecord from a file path.
+        
+        Callers that already hold the file's stat result or a trusted hash
+        for it can pass them in to skip the corresponding syscalls and reads.
+        """
         try:
-            stat_info = os.stat(file_path)
+            if stat_info is None:
+                stat_info = os.stat(file_path)
             
-            # Calculate SHA-256 hash
-            file_hash = cls._calculate_hash(file_path)
+            # Calculate content hash
+            if file_hash is None:
+                file_hash = cls._calculate_hash(file_path, hash_algorithm, stat_info.st_size)
             
             # Get owner and group info
-            try:
-                import pwd
-                import grp
-                owner = pwd.getpwuid(stat_info.st_uid).pw_name
-                group = grp.getgrgid(stat_info.st_gid).gr_name
-            except (ImportError, KeyError):
-                # Fallback for Windows or missing user/group info
-                owner = str(stat_info.st_uid)
-                group = str(stat_info.st_gid)
+            owner, group = _owner_group(stat_info.st_uid, stat_info.st_gid)
             
             return cls(
                 file_path=file_path,
@@ -56,26 +106,65 @@ class FileRecord:
                 permissions=stat_info.st_mode,
                 owner=owner,
                 group=group,
+                hash_algorithm=hash_algorithm,
             )
         except (OSError, IOError) as e:
             raise ValueError(f"Could not read file {file_path}: {e}")
     
     @staticmethod
-    def _calculate_hash(file_path: str) -> str:
-        """Calculate SHA-256 hash of a file."""
-        hash_obj = hashlib.sha256()
+    def _new_hash(hash_algorithm: str):
+        """Create an empty hash object for the given algorithm."""
+        constructor = _HASH_CONSTRUCTORS.get(hash_algorithm)
+        if constructor is not None:
+            return constructor()
+        return hashlib.new(hash_algorithm)
+    
+    @staticmethod
+    def _calculate_hash(file_path: str, hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+                        file_size: Optional[int] = None) -> str:
+        """Calculate the content hash of a file with the given algorithm.
         
+        Passing the expected file_size lets small files be hashed from a single
+        read() syscall and large ones get a sequential readahead hint.
+        """
         try:
-            with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_obj.update(chunk)
+            if file_size is not None and file_size <= HASH_CHUNK_SIZE:
+                # Small files skip the file object entirely: open, one sized
+                # read() syscall, close. Reading size + 1 bytes detects growth.
+                fd = os.open(file_path, _READ_FLAGS)
+                try:
+                    data = os.read(fd, file_size + 1)
+                finally:
+                    os.close(fd)
+                if len(data) <= file_size:
+                    hash_obj = FileRecord._new_hash(hash_algorithm)
+                    hash_obj.update(data)
+                    return hash_obj.hexdigest()
+                # The file grew since it was stat'ed; hash it as a large file
+                file_size = None
+            
+            # Unbuffered: the hash loop reads straight into its own buffer
+            with open(file_path, 'rb', buffering=0) as f:
+                if file_size is not None and hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                
+                hash_obj = FileRecord._new_hash(hash_algorithm)
+                
+                # Reuse one buffer rather than allocating a bytes object per chunk
+                buffer = bytearray(HASH_CHUNK_SIZE)
+                view = memoryview(buffer)
+                while True:
+                    size = f.readinto(buffer)
+                    if not size:
+                        break
+                    hash_obj.update(view[:size])
         except (OSError, IOError):
             return ""
         
         return hash_obj.hexdigest()
 
 
-@dataclass
+@dataclass(slots=True)
 class FileEvent:
     """Represents a file system event."""
     event_type: EventType
@@ -0,0 +1,159 @@
+"""
+Tests for database schema migrations.
+"""
+
+import hashlib
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from fim.database import DatabaseManager
+from fim.models import EventType
+
+
+# The schema as created before digests became BLOBs and timestamps integers
+OLD_SCHEMA_SQL = """
+    CREATE TABLE baseline (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        file_path TEXT UNIQUE NOT NULL,
+        file_hash TEXT NOT NULL,
+        file_size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        permissions INTEGER NOT NULL,
+        owner TEXT NOT NULL,
+        group_name TEXT NOT NULL
+    );
+    CREATE TABLE events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_type TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        agent_id TEXT NOT NULL
+    );
+    CREATE INDEX idx_baseline_path ON baseline(file_path);
+    CREATE INDEX idx_events_path ON events(file_path);
+"""
+
+BASELINE_ROWS = [
+    (f"/data/file{i}.txt", hashlib.sha256(str(i).encode()).hexdigest(), 100 + i,
+     1700000000.5 + i, 0o100644, "root", "root")
+    for i in range(5)
+]
+
+EVENT_ROWS = [
+    ("created", "/data/file0.txt", "2024-01-02T03:04:05.123456", "agent"),
+    ("modified", "/data/file1.txt", "2024-01-02T03:04:06", "agent"),
+    ("deleted", "/data/file2.txt", "2024-03-04T05:06:07.000001", "default"),
+]
+
+
+@pytest.fixture
+def old_db(tmp_path):
+    """Create a database with the original TEXT-digest, ISO-timestamp schema."""
+    db_path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(OLD_SCHEMA_SQL)
+    conn.executemany(
+        "INSERT INTO baseline (file_path, file_hash, file_size, mtime, permissions, owner, group_name) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        BASELINE_ROWS,
+    )
+    conn.executemany(
+        "INSERT INTO events (event_type, file_path, timestamp, agent_id) VALUES (?, ?, ?, ?)",
+        EVENT_ROWS,
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def _schema(db_path):
+    """Return the schema version and table/index definitions of a database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        objects = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+        return version, objects
+    finally:
+        conn.close()
+
+
+def test_migration_preserves_baseline(old_db):
+    """Hex TEXT digests are converted to BLOBs without losing rows."""
+    database = DatabaseManager(old_db)
+    try:
+        records = {record.file_path: record for record in database.get_baseline()}
+        assert database.baseline_count() == len(BASELINE_ROWS)
+        for file_path, file_hash, file_size, mtime, permissions, owner, group in BASELINE_ROWS:
+            record = records[file_path]
+            assert record.file_hash == file_hash
+            assert record.file_size == file_size
+            assert record.mtime == mtime
+            assert record.permissions == permissions
+            assert (record.owner, record.group) == (owner, group)
+            assert record.hash_algorithm == "sha256"
+
+        hashes = database.get_baseline_hashes()
+        assert hashes["/data/file0.txt"] == (bytes.fromhex(BASELINE_ROWS[0][1]), "sha256")
+    finally:
+        database.close()
+
+
+def test_migration_preserves_events(old_db):
+    """ISO-8601 TEXT timestamps are converted to epoch microseconds exactly."""
+    database = DatabaseManager(old_db)
+    try:
+        events = database.get_events()
+        assert len(events) == len(EVENT_ROWS)
+
+        expected = sorted(EVENT_ROWS, key=lambda row: row[2], reverse=True)
+        for event, (event_type, file_path, timestamp, agent_id) in zip(events, expected):
+            assert event.event_type == EventType(event_type)
+            assert event.file_path == file_path
+            assert event.timestamp == datetime.fromisoformat(timestamp)
+            assert event.agent_id == agent_id
+    finally:
+        database.close()
+
+
+def test_migration_updates_schema(old_db):
+    """Column types and indexes match the current schema after migrating."""
+    DatabaseManager(old_db).close()
+
+    conn = sqlite3.connect(old_db)
+    try:
+        assert conn.execute(
+            "SELECT COUNT(*) FROM baseline WHERE typeof(file_hash) != 'blob'"
+        ).fetchone()[0] == 0
+        assert conn.execute(
+            "SELECT COUNT(*) FROM events WHERE typeof(timestamp) != 'integer'"
+        ).fetchone()[0] == 0
+
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert "idx_baseline_path" not in indexes
+        assert "idx_events_path" not in indexes
+        assert {"idx_events_path_ts", "idx_events_ts"} <= indexes
+    finally:
+        conn.close()
+
+
+def test_second_open_is_noop(old_db):
+    """Opening an already migrated database leaves its schema and rows untouched."""
+    DatabaseManager(old_db).close()
+    schema = _schema(old_db)
+    database = DatabaseManager(old_db)
+    try:
+        baseline = database.get_baseline()
+        events = database.get_events()
+    finally:
+        database.close()
+
+    assert _schema(old_db) == schema
+
+    database = DatabaseManager(old_db)
+    try:
+        assert database.get_baseline() == baseline
+        assert database.get_events() == events
+    finally:
+        database.close()